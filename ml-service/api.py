@@ -4,13 +4,31 @@ Uses pre-trained Linear Regression model
 Run: python api.py
 """
 
+import functools
 import json
 import math
 from pathlib import Path
-from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import urllib.parse
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is an optional accelerator
+    njit = None
+
+try:
+    import orjson
+
+    def _json_bytes(obj):
+        """Serialize a response payload to JSON bytes (Rust-backed)."""
+        return orjson.dumps(obj)
+except ImportError:
+    def _json_bytes(obj):
+        """Serialize a response payload to JSON bytes (stdlib fallback)."""
+        return json.dumps(obj).encode()
+
 # Load model
 MODEL_FILE = Path(__file__).parent / "models" / "price_model.json"
 
@@ -25,22 +43,74 @@ print(f"✅ Model loaded successfully")
 print(f"   MAE: ${MODEL_DATA['mae']:.2f}")
 print(f"   RMSE: ${MODEL_DATA['rmse']:.2f}")
 
+# Fold the feature normalization into the weights once at load time:
+# w' = w / std and b' = b - sum(w * mean / std), so prediction is just
+# b' + dot(w', raw_features) with no per-request subtracts/divides.
+# Stored as NumPy arrays so the dot product runs as one BLAS call.
+W_PRIME = (
+    np.asarray(MODEL_DATA['weights'], dtype=np.float64)
+    / np.asarray(MODEL_DATA['std_x'], dtype=np.float64)
+)
+B_PRIME = MODEL_DATA['bias'] - float(
+    W_PRIME @ np.asarray(MODEL_DATA['mean_x'], dtype=np.float64)
+)
+N_FEATURES = len(W_PRIME)
+
+
+if njit is not None:
+    # JIT-compile the numeric core to native code; the explicit loop lets
+    # LLVM auto-vectorize the fused multiply-adds.
+    @njit(cache=True, fastmath=True)
+    def _predict_core(feats, weights, bias):
+        acc = bias
+        for i in range(feats.shape[0]):
+            acc += weights[i] * feats[i]
+        return acc if acc > 0.0 else 0.0
+
+    # Warm up once at startup so the first request doesn't pay compilation.
+    _predict_core(np.zeros(N_FEATURES, dtype=np.float64), W_PRIME, B_PRIME)
+else:
+    def _predict_core(feats, weights, bias):
+        """NumPy fallback when numba isn't installed."""
+        acc = bias + float(weights @ feats)
+        return acc if acc > 0.0 else 0.0
+
 
 def extract_hour(time_str):
-    """Extract hour from datetime string"""
-    try:
-        dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-        return dt.hour
-    except:
-        try:
-            return int(time_str.split(' ')[1].split(':')[0])
-        except:
-            return 12
+    """Extract hour from a datetime or time string.
+
+    Slices the hour digits directly instead of building a full datetime
+    object: 'YYYY-MM-DD HH:MM' / ISO strings keep the hour at a fixed
+    offset, bare 'HH:MM' strings are read up to the first colon.
+    Falls back to noon when no hour can be found.
+    """
+    # 'YYYY-MM-DD HH:MM' or 'YYYY-MM-DDTHH:MM:SS'
+    if len(time_str) >= 13 and (time_str[10] == ' ' or time_str[10] == 'T'):
+        hh = time_str[11:13]
+        if hh.isdigit():
+            return int(hh)
+    # Bare 'HH:MM' / 'H:MM'
+    colon = time_str.find(':')
+    if colon > 0:
+        hh = time_str[max(0, colon - 2):colon]
+        if hh.isdigit():
+            return int(hh)
+    return 12
+
+
+def _cached_encoder(mapping):
+    """Build an lru_cached category encoder over an immutable mapping.
 
+    The category maps never change after load, so common values resolve
+    through the cache instead of repeated dict lookups; unknowns map to -1.
+    """
+    return functools.lru_cache(maxsize=128)(lambda value: mapping.get(value, -1))
 
-def encode_category(value, mapping):
-    """Get encoded value for category, or -1 if unknown"""
-    return mapping.get(value, -1)
+
+encode_airline = _cached_encoder(MODEL_DATA['airline_map'])
+encode_source = _cached_encoder(MODEL_DATA['source_map'])
+encode_dest = _cached_encoder(MODEL_DATA['dest_map'])
+encode_class = _cached_encoder(MODEL_DATA['class_map'])
 
 
 def predict_price(flight_data):
@@ -48,13 +118,13 @@ def predict_price(flight_data):
     try:
         # Extract and encode features
         features = [
-            encode_category(flight_data.get('airline', ''), MODEL_DATA['airline_map']),
-            encode_category(flight_data.get('source_city', ''), MODEL_DATA['source_map']),
+            encode_airline(flight_data.get('airline', '')),
+            encode_source(flight_data.get('source_city', '')),
             float(flight_data.get('stops', 0)),
             float(extract_hour(flight_data.get('departure_time', ''))),
             float(extract_hour(flight_data.get('arrival_time', ''))),
-            encode_category(flight_data.get('destinatin', ''), MODEL_DATA['dest_map']),
-            encode_category(flight_data.get('class', 'Economy'), MODEL_DATA['class_map']),
+            encode_dest(flight_data.get('destinatin', '')),
+            encode_class(flight_data.get('class', 'Economy')),
             float(flight_data.get('duratin', 0)),
             float(flight_data.get('days_left', 0)),
         ]
@@ -63,102 +133,103 @@ def predict_price(flight_data):
         if any(f == -1 for f in features):
             return None, "Unknown airline, city, or class"
         
-        # Normalize features
-        normalized = []
-        for i, feature in enumerate(features):
-            norm = (feature - MODEL_DATA['mean_x'][i]) / MODEL_DATA['std_x'][i]
-            normalized.append(norm)
-        
-        # Predict
-        prediction = MODEL_DATA['bias'] + sum(
-            MODEL_DATA['weights'][i] * normalized[i] 
-            for i in range(len(normalized))
-        )
-        
-        # Ensure positive price
-        prediction = max(0, prediction)
-        
+        # Predict (normalization is pre-folded into W_PRIME / B_PRIME,
+        # and the clamp to a non-negative price happens in the core)
+        feats = np.fromiter(features, dtype=np.float64, count=N_FEATURES)
+        prediction = float(_predict_core(feats, W_PRIME, B_PRIME))
+
         return prediction, None
     
     except Exception as e:
         return None, str(e)
 
 
+# /health and /model-info are constant for the process lifetime, so
+# their bodies are serialized once at startup
+HEALTH_BYTES = _json_bytes({
+    'status': 'healthy',
+    'model_loaded': True,
+    'service': 'flight-price-prediction'
+})
+MODEL_INFO_BYTES = _json_bytes({
+    'status': 'success',
+    'model': 'Linear Regression',
+    'features': MODEL_DATA['feature_names'],
+    'airlines': list(MODEL_DATA['airline_map'].keys()),
+    'cities': list(MODEL_DATA['source_map'].keys()),
+    'classes': list(MODEL_DATA['class_map'].keys()),
+    'performance': {
+        'mae': f"${MODEL_DATA['mae']:.2f}",
+        'rmse': f"${MODEL_DATA['rmse']:.2f}"
+    }
+})
+
+
+def _send_bytes(handler, status, body):
+    """Write a pre-serialized JSON response through a request handler"""
+    handler.send_response(status)
+    handler.send_header('Content-type', 'application/json')
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def _send_json(handler, status, payload):
+    """Write a JSON response through a request handler"""
+    _send_bytes(handler, status, _json_bytes(payload))
+
+
+def _health(handler, params):
+    _send_bytes(handler, 200, HEALTH_BYTES)
+
+
+def _predict(handler, params):
+    flight_data = {key: values[0] if values else '' for key, values in params.items()}
+
+    # Make prediction
+    price, error = predict_price(flight_data)
+
+    if price is not None:
+        _send_json(handler, 200, {
+            'status': 'success',
+            'predicted_price': round(float(price), 2),
+            'currency': 'USD',
+            'input': {
+                'airline': flight_data.get('airline'),
+                'route': f"{flight_data.get('source_city')} → {flight_data.get('destinatin')}",
+                'class': flight_data.get('class'),
+                'stops': int(float(flight_data.get('stops', 0))),
+                'days_left': int(float(flight_data.get('days_left', 0)))
+            }
+        })
+    else:
+        _send_json(handler, 400, {'status': 'error', 'error': error})
+
+
+def _model_info(handler, params):
+    _send_bytes(handler, 200, MODEL_INFO_BYTES)
+
+
+def _not_found(handler, params):
+    _send_json(handler, 404, {'error': 'Not found'})
+
+
+# O(1) route dispatch instead of a chain of string comparisons
+ROUTES = {
+    '/health': _health,
+    '/predict': _predict,
+    '/model-info': _model_info,
+}
+
+
 class PredictionHandler(BaseHTTPRequestHandler):
     """HTTP request handler for predictions"""
-    
+
     def do_GET(self):
-        """Handle GET requests"""
-        if self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = {
-                'status': 'healthy',
-                'model_loaded': True,
-                'service': 'flight-price-prediction'
-            }
-            self.wfile.write(json.dumps(response).encode())
-        
-        elif self.path.startswith('/predict?'):
-            # Parse query parameters
-            query_string = self.path.split('?')[1]
-            params = urllib.parse.parse_qs(query_string)
-            
-            flight_data = {}
-            for key, values in params.items():
-                flight_data[key] = values[0] if values else ''
-            
-            # Make prediction
-            price, error = predict_price(flight_data)
-            
-            self.send_response(200 if price is not None else 400)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            if price is not None:
-                response = {
-                    'status': 'success',
-                    'predicted_price': round(float(price), 2),
-                    'currency': 'USD',
-                    'input': {
-                        'airline': flight_data.get('airline'),
-                        'route': f"{flight_data.get('source_city')} → {flight_data.get('destinatin')}",
-                        'class': flight_data.get('class'),
-                        'stops': int(float(flight_data.get('stops', 0))),
-                        'days_left': int(float(flight_data.get('days_left', 0)))
-                    }
-                }
-            else:
-                response = {'status': 'error', 'error': error}
-            
-            self.wfile.write(json.dumps(response).encode())
-        
-        elif self.path == '/model-info':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = {
-                'status': 'success',
-                'model': 'Linear Regression',
-                'features': MODEL_DATA['feature_names'],
-                'airlines': list(MODEL_DATA['airline_map'].keys()),
-                'cities': list(MODEL_DATA['source_map'].keys()),
-                'classes': list(MODEL_DATA['class_map'].keys()),
-                'performance': {
-                    'mae': f"${MODEL_DATA['mae']:.2f}",
-                    'rmse': f"${MODEL_DATA['rmse']:.2f}"
-                }
-            }
-            self.wfile.write(json.dumps(response).encode())
-        
-        else:
-            self.send_response(404)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = {'error': 'Not found'}
-            self.wfile.write(json.dumps(response).encode())
-    
+        """Dispatch GET requests through the route table"""
+        route, _, query_string = self.path.partition('?')
+        params = urllib.parse.parse_qs(query_string) if query_string else {}
+        ROUTES.get(route, _not_found)(self, params)
+
     def log_message(self, format, *args):
         """Suppress default logging"""
         return
@@ -167,7 +238,11 @@ class PredictionHandler(BaseHTTPRequestHandler):
 def run_server(port=5000):
     """Run the prediction server"""
     server_address = ('', port)
-    httpd = HTTPServer(server_address, PredictionHandler)
+    # ThreadingHTTPServer dispatches each request on its own thread; the
+    # GIL is released during socket I/O and the NumPy dot product, so
+    # concurrent predictions actually overlap.
+    httpd = ThreadingHTTPServer(server_address, PredictionHandler)
+    httpd.daemon_threads = True
     
     print(f"\n🚀 Flight Price Prediction Server")
     print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
@@ -0,0 +1,71 @@
+"""
+Flight Price Prediction API Server (ASGI)
+Same endpoints as api.py, served by uvicorn's event loop and C HTTP parser
+Run: python api_asgi.py
+"""
+
+import urllib.parse
+
+# Reuse the loaded model, prediction path, JSON encoder and cached
+# constant responses from api.py
+from api import HEALTH_BYTES, MODEL_INFO_BYTES, predict_price, _json_bytes
+
+HEADERS = [(b'content-type', b'application/json')]
+
+
+async def _send_bytes(send, status, body):
+    await send({'type': 'http.response.start', 'status': status, 'headers': HEADERS})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, status, payload):
+    await _send_bytes(send, status, _json_bytes(payload))
+
+
+async def app(scope, receive, send):
+    """Minimal ASGI application: GET /health, /predict, /model-info"""
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+
+    if scope['method'] != 'GET':
+        await _send_json(send, 405, {'error': 'Method not allowed'})
+
+    elif path == '/health':
+        await _send_bytes(send, 200, HEALTH_BYTES)
+
+    elif path == '/predict':
+        params = urllib.parse.parse_qs(scope['query_string'].decode())
+        flight_data = {key: values[0] if values else '' for key, values in params.items()}
+
+        price, error = predict_price(flight_data)
+
+        if price is not None:
+            await _send_json(send, 200, {
+                'status': 'success',
+                'predicted_price': round(float(price), 2),
+                'currency': 'USD',
+                'input': {
+                    'airline': flight_data.get('airline'),
+                    'route': f"{flight_data.get('source_city')} → {flight_data.get('destinatin')}",
+                    'class': flight_data.get('class'),
+                    'stops': int(float(flight_data.get('stops', 0))),
+                    'days_left': int(float(flight_data.get('days_left', 0)))
+                }
+            })
+        else:
+            await _send_json(send, 400, {'status': 'error', 'error': error})
+
+    elif path == '/model-info':
+        await _send_bytes(send, 200, MODEL_INFO_BYTES)
+
+    else:
+        await _send_json(send, 404, {'error': 'Not found'})
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    # uvicorn[standard] picks up uvloop + httptools automatically
+    uvicorn.run(app, host='0.0.0.0', port=5000, access_log=False)
@@ -4,11 +4,23 @@ Uses pre-trained Linear Regression model
 Run: python api_simple.py
 """
 
+import functools
 import json
 import math
 from pathlib import Path
-from datetime import datetime
 import socket
+import threading
+
+try:
+    import orjson
+
+    def _json_bytes(obj):
+        """Serialize a response payload to JSON bytes (Rust-backed)."""
+        return orjson.dumps(obj)
+except ImportError:
+    def _json_bytes(obj):
+        """Serialize a response payload to JSON bytes (stdlib fallback)."""
+        return json.dumps(obj).encode()
 
 # Load model
 MODEL_FILE = Path(__file__).parent / "models" / "price_model.json"
@@ -24,56 +36,80 @@ print(f"✅ Model loaded successfully")
 print(f"   MAE: ${MODEL_DATA['mae']:.2f}")
 print(f"   RMSE: ${MODEL_DATA['rmse']:.2f}")
 
+# Fold the feature normalization into the weights once at load time:
+# w' = w / std and b' = b - sum(w * mean / std), so prediction is just
+# b' + dot(w', raw_features) with no per-request subtracts/divides.
+W_PRIME = tuple(
+    w / s for w, s in zip(MODEL_DATA['weights'], MODEL_DATA['std_x'])
+)
+B_PRIME = MODEL_DATA['bias'] - sum(
+    w * m / s
+    for w, m, s in zip(MODEL_DATA['weights'], MODEL_DATA['mean_x'], MODEL_DATA['std_x'])
+)
+
 
 def extract_hour(time_str):
-    """Extract hour from datetime string"""
-    try:
-        dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-        return dt.hour
-    except:
-        try:
-            return int(time_str.split(' ')[1].split(':')[0])
-        except:
-            return 12
+    """Extract hour from a datetime or time string.
+
+    Slices the hour digits directly instead of building a full datetime
+    object: 'YYYY-MM-DD HH:MM' / ISO strings keep the hour at a fixed
+    offset, bare 'HH:MM' strings are read up to the first colon.
+    Falls back to noon when no hour can be found.
+    """
+    # 'YYYY-MM-DD HH:MM' or 'YYYY-MM-DDTHH:MM:SS'
+    if len(time_str) >= 13 and (time_str[10] == ' ' or time_str[10] == 'T'):
+        hh = time_str[11:13]
+        if hh.isdigit():
+            return int(hh)
+    # Bare 'HH:MM' / 'H:MM'
+    colon = time_str.find(':')
+    if colon > 0:
+        hh = time_str[max(0, colon - 2):colon]
+        if hh.isdigit():
+            return int(hh)
+    return 12
+
 
+def _cached_encoder(mapping):
+    """Build an lru_cached category encoder over an immutable mapping.
 
-def encode_category(value, mapping):
-    """Get encoded value for category, or -1 if unknown"""
-    return mapping.get(value, -1)
+    The category maps never change after load, so common values resolve
+    through the cache instead of repeated dict lookups; unknowns map to -1.
+    """
+    return functools.lru_cache(maxsize=128)(lambda value: mapping.get(value, -1))
+
+
+encode_airline = _cached_encoder(MODEL_DATA['airline_map'])
+encode_source = _cached_encoder(MODEL_DATA['source_map'])
+encode_dest = _cached_encoder(MODEL_DATA['dest_map'])
+encode_class = _cached_encoder(MODEL_DATA['class_map'])
 
 
 def predict_price(flight_data):
     """Predict price for a flight"""
     try:
-        # Extract and encode features
-        features = [
-            encode_category(flight_data.get('airline', ''), MODEL_DATA['airline_map']),
-            encode_category(flight_data.get('source_city', ''), MODEL_DATA['source_map']),
+        # Extract and encode features (tuple: cheapest to build and iterate)
+        features = (
+            encode_airline(flight_data.get('airline', '')),
+            encode_source(flight_data.get('source_city', '')),
             float(flight_data.get('stops', 0)),
             float(extract_hour(flight_data.get('departure_time', ''))),
             float(extract_hour(flight_data.get('arrival_time', ''))),
-            encode_category(flight_data.get('destinatin', ''), MODEL_DATA['dest_map']),
-            encode_category(flight_data.get('class', 'Economy'), MODEL_DATA['class_map']),
+            encode_dest(flight_data.get('destinatin', '')),
+            encode_class(flight_data.get('class', 'Economy')),
             float(flight_data.get('duratin', 0)),
             float(flight_data.get('days_left', 0)),
-        ]
-        
+        )
+
         # Check for missing categories
-        if any(f == -1 for f in features):
+        if -1 in features:
             return None, "Unknown airline, city, or class"
-        
-        # Normalize features
-        normalized = []
-        for i, feature in enumerate(features):
-            norm = (feature - MODEL_DATA['mean_x'][i]) / MODEL_DATA['std_x'][i]
-            normalized.append(norm)
-        
-        # Predict
-        prediction = MODEL_DATA['bias'] + sum(
-            MODEL_DATA['weights'][i] * normalized[i] 
-            for i in range(len(normalized))
-        )
-        
+
+        # Predict (normalization is pre-folded into W_PRIME / B_PRIME);
+        # zip over the module-level weight tuple avoids per-item indexing
+        # and any MODEL_DATA dict lookups in the hot path
+        prediction = B_PRIME + sum(w * f for w, f in zip(W_PRIME, features))
+
         # Ensure positive price
         prediction = max(0, prediction)
         
@@ -83,6 +119,47 @@ def predict_price(flight_data):
         return None, str(e)
 
 
+def build_http_response(status, body, keep_alive=False):
+    """Assemble a full HTTP/1.1 response (headers + JSON body) as bytes"""
+    header = (
+        f"HTTP/1.1 {status} {'OK' if status == 200 else 'Bad Request'}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return header.encode() + body
+
+
+def _cached_responses(status, payload):
+    """(close, keep-alive) response pair for a constant payload"""
+    body = _json_bytes(payload)
+    return (build_http_response(status, body, False),
+            build_http_response(status, body, True))
+
+
+# /health and /model-info are constant for the process lifetime, so the
+# complete responses (headers included) are assembled once at startup;
+# index with the connection's keep_alive flag
+HEALTH_RESPONSES = _cached_responses(200, {
+    'status': 'healthy',
+    'model_loaded': True,
+    'service': 'flight-price-prediction'
+})
+MODEL_INFO_RESPONSES = _cached_responses(200, {
+    'status': 'success',
+    'model': 'Linear Regression',
+    'features': MODEL_DATA['feature_names'],
+    'airlines': list(MODEL_DATA['airline_map'].keys()),
+    'cities': list(MODEL_DATA['source_map'].keys()),
+    'classes': list(MODEL_DATA['class_map'].keys()),
+    'performance': {
+        'mae': f"${MODEL_DATA['mae']:.2f}",
+        'rmse': f"${MODEL_DATA['rmse']:.2f}"
+    }
+})
+NOT_FOUND_RESPONSES = _cached_responses(404, {'error': 'Not found'})
+
+
 def parse_query(query_string):
     """Parse query string into dictionary"""
     params = {}
@@ -97,71 +174,59 @@ def parse_query(query_string):
     return params
 
 
-def run_server(port=5000):
-    """Run simple HTTP prediction server"""
-    
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server_socket.bind(('0.0.0.0', port))
-    server_socket.listen(5)
-    
-    print(f"\n🚀 Flight Price Prediction Server")
-    print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-    print(f"📍 Server running on http://localhost:{port}")
-    print(f"\n📚 Endpoints:")
-    print(f"   GET /health - Health check")
-    print(f"   GET /predict?airline=X&source_city=Y&... - Single prediction")
-    print(f"   GET /model-info - Model information")
-    print(f"\n💡 Example:")
-    print(f"   http://localhost:{port}/predict?airline=IndiGo&source_city=Mumbai&stops=0&departure_time=10:00&arrival_time=12:30&destinatin=Delhi&class=Business&duratin=150&days_left=5")
-    print(f"\n⏹️  Press Ctrl+C to stop\n")
-    
+# Keep-alive connections are dropped after this many idle seconds so a
+# quiet client can't pin a handler thread forever
+KEEP_ALIVE_TIMEOUT = 30
+
+
+def handle_connection(client_socket):
+    """Serve one client connection (possibly many keep-alive requests)"""
+
+    # Small JSON responses should not sit in Nagle's buffer waiting
+    # for an ACK; each response goes out in a single sendall anyway
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    client_socket.settimeout(KEEP_ALIVE_TIMEOUT)
+
+    # Receive HTTP requests through a buffered reader: one readline
+    # for the request line, then drain headers. Avoids the 1 KiB
+    # recv loop, byte concatenation and repeated \r\n\r\n scans.
+    # The reader persists across requests so keep-alive clients
+    # reuse the connection instead of paying a TCP handshake each.
+    rfile = client_socket.makefile('rb', buffering=4096)
+
     try:
-        while True:
-            client_socket, client_address = server_socket.accept()
-            
-            # Receive HTTP request
-            request_data = b''
+        keep_alive = True
+        while keep_alive:
+            request_line = rfile.readline(8192).decode('latin-1').split()
+            if len(request_line) < 2:
+                break
+
+            # HTTP/1.1 defaults to keep-alive, HTTP/1.0 to close; an
+            # explicit Connection header from the client overrides
+            connection = 'keep-alive' if request_line[2:] == ['HTTP/1.1'] else 'close'
             while True:
-                data = client_socket.recv(1024)
-                if not data:
+                header = rfile.readline(8192)
+                if not header.strip():
                     break
-                request_data += data
-                if b'\r\n\r\n' in request_data:
-                    break
-            
-            request_str = request_data.decode('utf-8', errors='ignore')
-            lines = request_str.split('\r\n')
-            request_line = lines[0].split()
-            
-            if len(request_line) < 2:
-                client_socket.close()
-                continue
-            
+                name, _, value = header.decode('latin-1').partition(':')
+                if name.lower() == 'connection':
+                    connection = value.strip().lower()
+            keep_alive = connection == 'keep-alive'
+
             path = request_line[1]
-            
-            # Handle requests
-            response = b''
-            content_type = 'application/json'
-            status = 404
-            
+
+            # Handle requests (constant endpoints use cached responses)
             if path == '/health':
-                status = 200
-                response_data = {
-                    'status': 'healthy',
-                    'model_loaded': True,
-                    'service': 'flight-price-prediction'
-                }
-                response = json.dumps(response_data).encode()
-            
+                full_response = HEALTH_RESPONSES[keep_alive]
+
             elif path.startswith('/predict?'):
-                status = 200
                 query_string = path.split('?')[1]
                 flight_data = parse_query(query_string)
-                
+
                 price, error = predict_price(flight_data)
-                
+
                 if price is not None:
+                    status = 200
                     response_data = {
                         'status': 'success',
                         'predicted_price': round(float(price), 2),
@@ -177,40 +242,60 @@ def run_server(port=5000):
                 else:
                     status = 400
                     response_data = {'status': 'error', 'error': error}
-                
-                response = json.dumps(response_data).encode()
-            
+
+                full_response = build_http_response(
+                    status, _json_bytes(response_data), keep_alive)
+
             elif path == '/model-info':
-                status = 200
-                response_data = {
-                    'status': 'success',
-                    'model': 'Linear Regression',
-                    'features': MODEL_DATA['feature_names'],
-                    'airlines': list(MODEL_DATA['airline_map'].keys()),
-                    'cities': list(MODEL_DATA['source_map'].keys()),
-                    'classes': list(MODEL_DATA['class_map'].keys()),
-                    'performance': {
-                        'mae': f"${MODEL_DATA['mae']:.2f}",
-                        'rmse': f"${MODEL_DATA['rmse']:.2f}"
-                    }
-                }
-                response = json.dumps(response_data).encode()
-            
+                full_response = MODEL_INFO_RESPONSES[keep_alive]
+
             else:
-                status = 404
-                response_data = {'error': 'Not found'}
-                response = json.dumps(response_data).encode()
-            
-            # Send HTTP response
-            http_response = f"HTTP/1.1 {status} {'OK' if status == 200 else 'Bad Request'}\r\n"
-            http_response += f"Content-Type: {content_type}\r\n"
-            http_response += f"Content-Length: {len(response)}\r\n"
-            http_response += "Connection: close\r\n\r\n"
-            
-            client_socket.sendall(http_response.encode() + response)
-            client_socket.close()
-            
+                full_response = NOT_FOUND_RESPONSES[keep_alive]
+
+            # Send HTTP response (headers + body in one syscall)
+            client_socket.sendall(full_response)
+
             print(f"✅ {request_line[0]} {path}")
+
+    except (TimeoutError, OSError):
+        # Idle keep-alive client or mid-request disconnect — just drop
+        # the connection
+        pass
+    finally:
+        rfile.close()
+        client_socket.close()
+
+
+def run_server(port=5000):
+    """Run simple HTTP prediction server"""
+
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server_socket.bind(('0.0.0.0', port))
+    server_socket.listen(5)
+    
+    print(f"\n🚀 Flight Price Prediction Server")
+    print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+    print(f"📍 Server running on http://localhost:{port}")
+    print(f"\n📚 Endpoints:")
+    print(f"   GET /health - Health check")
+    print(f"   GET /predict?airline=X&source_city=Y&... - Single prediction")
+    print(f"   GET /model-info - Model information")
+    print(f"\n💡 Example:")
+    print(f"   http://localhost:{port}/predict?airline=IndiGo&source_city=Mumbai&stops=0&departure_time=10:00&arrival_time=12:30&destinatin=Delhi&class=Business&duratin=150&days_left=5")
+    print(f"\n⏹️  Press Ctrl+C to stop\n")
+    
+    try:
+        while True:
+            client_socket, client_address = server_socket.accept()
+
+            # One daemon thread per connection: a keep-alive client that
+            # idles between requests must not block the accept loop
+            threading.Thread(
+                target=handle_connection,
+                args=(client_socket,),
+                daemon=True,
+            ).start()
     
     except KeyboardInterrupt:
         print("\n\n✋ Server stopped")
@@ -11,7 +11,7 @@ if env_file:
     load_dotenv(env_file)
 
 import os
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -20,6 +20,23 @@ from pathlib import Path
 import logging
 from datetime import datetime
 
+try:
+    import orjson
+
+    def _json_bytes(obj):
+        """Serialize a response payload to JSON bytes (Rust-backed).
+
+        OPT_SERIALIZE_NUMPY lets numpy scalars/arrays serialize without
+        explicit float() casts.
+        """
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    import json
+
+    def _json_bytes(obj):
+        """Serialize a response payload to JSON bytes (stdlib fallback)."""
+        return json.dumps(obj).encode()
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,13 +44,26 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+
+def json_response(payload, status=200):
+    """Build a JSON response without Flask's jsonify/stdlib-json overhead"""
+    return app.response_class(_json_bytes(payload), status=status,
+                              mimetype='application/json')
+
 print("🚀 Starting Flight Price Prediction Service...", env_file)
 # Model paths
 MODELS_DIR = Path(__file__).parent / "models"
 
 # Load model and preprocessing objects
 try:
-    model = joblib.load(MODELS_DIR / "price_model.pkl")
+    # mmap_mode='r' maps the forest's node arrays read-only from the OS
+    # page cache, so gunicorn workers forked with --preload share one
+    # resident copy instead of each deserializing its own
+    model = joblib.load(MODELS_DIR / "price_model.pkl", mmap_mode='r')
+    # Fan prediction out across cores; the Cython tree kernels release
+    # the GIL, so threaded per-tree prediction scales on large batches
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = -1
     encoders = joblib.load(MODELS_DIR / "encoders.pkl")
     scaler = joblib.load(MODELS_DIR / "scaler.pkl")
     feature_cols = joblib.load(MODELS_DIR / "feature_cols.pkl")
@@ -44,14 +74,134 @@ except Exception as e:
     logger.error(f"Make sure to run 'python train.py' first to train the model")
     MODEL_LOADED = False
 
+# Optional compiled inference: when onnxruntime is installed and train.py
+# exported price_model.onnx, tree traversal runs in ONNX Runtime's C++
+# kernels instead of sklearn's Python ensemble loop.
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+onnx_session = None
+if MODEL_LOADED and onnxruntime is not None:
+    ONNX_MODEL = MODELS_DIR / "price_model.onnx"
+    if ONNX_MODEL.exists():
+        try:
+            onnx_session = onnxruntime.InferenceSession(
+                str(ONNX_MODEL), providers=['CPUExecutionProvider']
+            )
+            logger.info("✅ Using compiled ONNX Runtime inference")
+        except Exception as e:
+            logger.warning(f"Failed to load ONNX model, using sklearn: {e}")
+
+
+def _predict_rows(X):
+    """Predict prices for a 2-D feature matrix, compiled path first."""
+    if onnx_session is not None:
+        X32 = np.asarray(X, dtype=np.float32)
+        input_name = onnx_session.get_inputs()[0].name
+        return onnx_session.run(None, {input_name: X32})[0].ravel()
+    return model.predict(X)
+
+
+CATEGORICAL_COLS = ['airline', 'source_city', 'class', 'destination_city']
+NUMERIC_COLS = ['stops', 'days_left', 'duration']
+TIME_COLS = ['departure_time', 'arrival_time']
+
+
+# Request validation: fastjsonschema compiles the schema to a specialized
+# function at import, so the per-request cost is a single call
+REQUIRED_FIELDS = ['airline', 'source_city', 'departure_time', 'stops',
+                   'arrival_time', 'destination_city', 'class', 'duration', 'days_left']
+
+try:
+    import fastjsonschema
+    _validate_predict = fastjsonschema.compile({
+        'type': 'object',
+        'required': REQUIRED_FIELDS,
+    })
+    _SchemaError = fastjsonschema.JsonSchemaException
+except ImportError:
+    _validate_predict = None
+    _SchemaError = None
+
+
+def _missing_fields_error(data):
+    """Return a 400 response for invalid request bodies, or None if valid"""
+    if _validate_predict is not None:
+        try:
+            _validate_predict(data)
+            return None
+        except _SchemaError as e:
+            return json_response({"error": str(e), "status": "error"}, 400)
+    missing_fields = [f for f in REQUIRED_FIELDS if f not in data]
+    if missing_fields:
+        return json_response({
+            "error": f"Missing required fields: {missing_fields}",
+            "status": "error"
+        }, 400)
+    return None
+
+
+def _parse_dt(value):
+    """Return (hour, day, month) for a 'YYYY-MM-DD HH:MM' style string.
+
+    The three components live at fixed offsets, so the fast path slices
+    them directly; anything shaped differently falls back to a full
+    datetime.fromisoformat parse (and raises for unparseable input, which
+    the endpoint reports as an error just like before).
+    """
+    s = str(value)
+    if len(s) >= 13 and s[4] == '-' and s[7] == '-' and (s[10] == ' ' or s[10] == 'T'):
+        try:
+            return int(s[11:13]), int(s[8:10]), int(s[5:7])
+        except ValueError:
+            pass
+    dt = datetime.fromisoformat(s)
+    return dt.hour, dt.day, dt.month
+
+def _category_maps(fitted_encoders):
+    """Flatten fitted encoders into plain {category: code} dicts.
+
+    train.py now saves encoders as {code: value} dicts; older pickles
+    hold LabelEncoders, whose transform builds an array and runs a
+    sorted search per call. Either way a dict lookup is O(1),
+    allocation-free, and lets unknown categories encode to -1 via .get
+    instead of raising ValueError.
+    """
+    maps = {}
+    for col in CATEGORICAL_COLS:
+        enc = fitted_encoders.get(col)
+        if enc is None:
+            continue
+        if isinstance(enc, dict):
+            maps[col] = {str(value): code for code, value in enc.items()}
+        else:
+            maps[col] = {cls: i for i, cls in enumerate(enc.classes_)}
+    return maps
+
+
+if MODEL_LOADED:
+    # Precomputed lookup tables for the prediction paths: /predict reads
+    # the dicts directly, /batch-predict maps them over whole columns.
+    CAT_MAPS = _category_maps(encoders)
+    NUM_IDX = np.asarray([feature_cols.index(col) for col in NUMERIC_COLS])
+    NUM_MEAN = scaler.mean_.astype(np.float64)
+    NUM_SCALE = scaler.scale_.astype(np.float64)
+
+# /health is hit constantly by load-balancer probes and never changes
+# for the process lifetime; serialize it once
+HEALTH_BYTES = _json_bytes({
+    "status": "healthy",
+    "model_loaded": MODEL_LOADED,
+    "service": "flight-price-prediction"
+})
+
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "model_loaded": MODEL_LOADED,
-        "service": "flight-price-prediction"
-    }), 200
+    return app.response_class(HEALTH_BYTES, mimetype='application/json')
 
 @app.route("/predict", methods=["POST"])
 def predict_price():
@@ -73,64 +223,52 @@ def predict_price():
     """
     try:
         if not MODEL_LOADED:
-            return jsonify({
+            return json_response({
                 "error": "Model not loaded. Please train the model first.",
                 "status": "error"
-            }), 503
+            }, 503)
         
         data = request.get_json()
-        
+
         # Validate required fields
-        required_fields = ['airline', 'source_city', 'departure_time', 'stops', 
-                          'arrival_time', 'destination_city', 'class', 'duration', 'days_left']
-        
-        missing_fields = [f for f in required_fields if f not in data]
-        if missing_fields:
-            return jsonify({
-                "error": f"Missing required fields: {missing_fields}",
-                "status": "error"
-            }), 400
-        
-        # Prepare features
-        df = pd.DataFrame([data])
-        
-        # Encode categorical variables
-        categorical_cols = ['airline', 'source_city', 'class', 'destination_city']
-        for col in categorical_cols:
-            if col in encoders:
-                try:
-                    df[col] = encoders[col].transform([df[col].iloc[0]])
-                except ValueError:
-                    # Handle unknown categories
-                    logger.warning(f"Unknown category for {col}: {df[col].iloc[0]}")
-                    df[col] = -1
+        error_response = _missing_fields_error(data)
+        if error_response is not None:
+            return error_response
         
+        # Prepare features as a plain dict -> flat ndarray (no DataFrame)
+        values = {}
+
+        # Encode categorical variables via precomputed dict lookups
+        for col in CATEGORICAL_COLS:
+            code = CAT_MAPS[col].get(str(data[col]), -1) if col in CAT_MAPS else -1
+            if code == -1:
+                logger.warning(f"Unknown category for {col}: {data[col]}")
+            values[col] = code
+
         # Extract time features
-        for time_col in ['departure_time', 'arrival_time']:
-            df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
-            df[f'{time_col}_hour'] = df[time_col].dt.hour.astype(int)
-            df[f'{time_col}_day'] = df[time_col].dt.day.astype(int)
-            df[f'{time_col}_month'] = df[time_col].dt.month.astype(int)
-            df.drop(time_col, axis=1, inplace=True)
-        
+        for time_col in TIME_COLS:
+            hour, day, month = _parse_dt(data[time_col])
+            values[f'{time_col}_hour'] = hour
+            values[f'{time_col}_day'] = day
+            values[f'{time_col}_month'] = month
+
         # Ensure numeric types
-        numeric_cols = ['stops', 'days_left', 'duration']
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        # Select and scale features
-        X = df[feature_cols].copy()
-        X[numeric_cols] = scaler.transform(X[numeric_cols])
-        
+        for col in NUMERIC_COLS:
+            values[col] = float(data[col])
+
+        # Assemble the row in feature order and scale numerics inline
+        row = np.array([values[col] for col in feature_cols], dtype=np.float64)
+        row[NUM_IDX] = (row[NUM_IDX] - NUM_MEAN) / NUM_SCALE
+
         # Make prediction
-        predicted_price = model.predict(X)[0]
+        predicted_price = _predict_rows(row.reshape(1, -1))[0]
         
         # Ensure positive price
         predicted_price = max(0, predicted_price)
         
         logger.info(f"✅ Prediction made: {data['airline']} {data['source_city']}-{data['destination_city']} -> ${predicted_price:.2f}")
         
-        return jsonify({
+        return json_response({
             "status": "success",
             "predicted_price": round(float(predicted_price), 2),
             "currency": "USD",
@@ -141,14 +279,14 @@ def predict_price():
                 "stops": int(data['stops']),
                 "days_left": int(data['days_left'])
             }
-        }), 200
+        }, 200)
     
     except Exception as e:
         logger.error(f"❌ Prediction error: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": str(e),
             "status": "error"
-        }), 500
+        }, 500)
 
 @app.route("/batch-predict", methods=["POST"])
 def batch_predict():
@@ -166,96 +304,91 @@ def batch_predict():
     """
     try:
         if not MODEL_LOADED:
-            return jsonify({
+            return json_response({
                 "error": "Model not loaded",
                 "status": "error"
-            }), 503
+            }, 503)
         
         data = request.get_json()
         flights = data.get('flights', [])
         
         if not flights:
-            return jsonify({
+            return json_response({
                 "error": "No flights provided",
                 "status": "error"
-            }), 400
+            }, 400)
         
+        # Prepare the whole batch at once: one DataFrame, one pass per
+        # column, and a single model.predict over all valid rows
+        df = pd.DataFrame(flights)
+
+        # Encode categorical variables via the precomputed maps
+        for col in CATEGORICAL_COLS:
+            if col in df.columns:
+                df[col] = df[col].astype(str).map(CAT_MAPS.get(col, {})).fillna(-1)
+            else:
+                df[col] = -1
+
+        # Extract time features (whole-column datetime parse)
+        for time_col in TIME_COLS:
+            if time_col in df.columns:
+                ts = pd.to_datetime(df[time_col], errors='coerce')
+            else:
+                ts = pd.Series(pd.NaT, index=df.index)
+            df[f'{time_col}_hour'] = ts.dt.hour
+            df[f'{time_col}_day'] = ts.dt.day
+            df[f'{time_col}_month'] = ts.dt.month
+
+        # Numeric conversion; missing columns become NaN
+        X = df.reindex(columns=feature_cols).apply(pd.to_numeric, errors='coerce')
+
+        # Rows with any unparseable/missing feature are tagged as failed
+        valid = X.notna().all(axis=1).to_numpy()
+        prices = np.full(len(flights), np.nan)
+        if valid.any():
+            X_valid = X.loc[valid].copy()
+            X_valid[NUMERIC_COLS] = scaler.transform(X_valid[NUMERIC_COLS])
+            prices[valid] = np.maximum(0, _predict_rows(X_valid))
+
         predictions = []
-        for flight_data in flights:
-            try:
-                # Prepare features
-                df = pd.DataFrame([flight_data])
-                
-                # Encode categorical variables
-                categorical_cols = ['airline', 'source_city', 'class', 'destination_city']
-                for col in categorical_cols:
-                    if col in encoders:
-                        try:
-                            df[col] = encoders[col].transform([df[col].iloc[0]])
-                        except ValueError:
-                            df[col] = -1
-                
-                # Extract time features
-                for time_col in ['departure_time', 'arrival_time']:
-                    df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
-                    df[f'{time_col}_hour'] = df[time_col].dt.hour.astype(int)
-                    df[f'{time_col}_day'] = df[time_col].dt.day.astype(int)
-                    df[f'{time_col}_month'] = df[time_col].dt.month.astype(int)
-                    df.drop(time_col, axis=1, inplace=True)
-                
-                # Numeric conversion
-                numeric_cols = ['stops', 'days_left', 'duration']
-                for col in numeric_cols:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                
-                # Select and scale features
-                X = df[feature_cols].copy()
-                X[numeric_cols] = scaler.transform(X[numeric_cols])
-                
-                # Predict
-                price = max(0, model.predict(X)[0])
-                
+        for i, flight_data in enumerate(flights):
+            if valid[i]:
                 predictions.append({
                     "flight": flight_data.get('airline', 'N/A'),
                     "route": f"{flight_data.get('source_city', 'N/A')} → {flight_data.get('destinatin', 'N/A')}",
-                    "predicted_price": round(float(price), 2),
+                    "predicted_price": round(float(prices[i]), 2),
                     "status": "success"
                 })
-            except Exception as e:
+            else:
                 predictions.append({
                     "flight": flight_data.get('airline', 'N/A'),
-                    "error": str(e),
+                    "error": "invalid or missing fields",
                     "status": "failed"
                 })
         
         successful = len([p for p in predictions if p['status'] == 'success'])
         logger.info(f"✅ Batch prediction completed: {successful}/{len(flights)} successful")
         
-        return jsonify({
+        return json_response({
             "status": "completed",
             "total": len(flights),
             "successful": successful,
             "predictions": predictions
-        }), 200
+        }, 200)
     
     except Exception as e:
         logger.error(f"❌ Batch prediction error: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": str(e),
             "status": "error"
-        }), 500
+        }, 500)
 
-@app.route("/model-info", methods=["GET"])
-def model_info():
-    if not MODEL_LOADED:
-        return jsonify({
-            "status": "unavailable",
-            "message": "Model not loaded"
-        }), 503
-    """Get model information and feature list"""
-    return jsonify({
+# Like /health, /model-info is constant once the model is loaded
+MODEL_INFO_BYTES = None
+if MODEL_LOADED:
+    MODEL_INFO_BYTES = _json_bytes({
         "status": "success",
-        "model": "Random Forest Regressor",
+        "model": type(model).__name__,
         "features": feature_cols,
         "categorical_features": ['airline', 'source_city', 'class', 'destinatin'],
         "numeric_features": ['stops', 'days_left', 'duratin', 'departure_time_hour', 'departure_time_day', 'departure_time_month', 'arrival_time_hour', 'arrival_time_day', 'arrival_time_month'],
@@ -270,9 +403,25 @@ def model_info():
             "duratin": "integer (flight duration in minutes)",
             "days_left": "integer (days until departure)"
         }
-    }), 200
+    })
+
+
+@app.route("/model-info", methods=["GET"])
+def model_info():
+    """Get model information and feature list"""
+    if not MODEL_LOADED:
+        return json_response({
+            "status": "unavailable",
+            "message": "Model not loaded"
+        }, 503)
+    return app.response_class(MODEL_INFO_BYTES, mimetype='application/json')
 
 if __name__ == "__main__":
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV', 'production') == 'development'
+    if not debug:
+        # Flask's built-in server is fine for local runs but serves one
+        # request at a time; production should sit behind gunicorn's
+        # pre-forked workers (see make serve / Dockerfile)
+        print("💡 Production: gunicorn -k gthread -w 4 --threads 8 -b 0.0.0.0:{} app:app".format(port))
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -6,8 +6,8 @@ Run: python train.py
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
 import joblib
 import os
@@ -17,10 +17,22 @@ from pathlib import Path
 MODELS_DIR = Path(__file__).parent / "models"
 MODELS_DIR.mkdir(exist_ok=True)
 
+# Categorical columns to encode
+CATEGORICAL_COLS = ['airline', 'source_city', 'class', 'destination_city']
+
+# Numeric columns
+NUMERIC_COLS = ['stops', 'days_left', 'duration']
+
 def load_and_prepare_data(csv_path):
     """Load and prepare the flight price dataset"""
     print(f"Loading data from {csv_path}...")
-    df = pd.read_csv(csv_path)
+    # The multithreaded Arrow parser is several times faster on the
+    # string-heavy columns; fall back to the default C engine when
+    # pyarrow isn't installed
+    try:
+        df = pd.read_csv(csv_path, engine='pyarrow')
+    except ImportError:
+        df = pd.read_csv(csv_path)
     
     print(f"Dataset shape: {df.shape}")
     print(f"Columns: {df.columns.tolist()}")
@@ -49,35 +61,45 @@ def preprocess_features(df, fit_encoders=True, encoders=None, scaler=None):
     if 'stops' in df.columns:
         stops_map = {'zero': 0, 'one': 1, 'two_or_more': 2, 'two or more': 2}
         df['stops'] = df['stops'].astype(str).str.lower().map(stops_map)
-        df['stops'] = df['stops'].fillna(0).astype(int)
-    
-    # Categorical columns to encode
-    categorical_cols = ['airline', 'source_city', 'class', 'destination_city']
+        df['stops'] = df['stops'].fillna(0).astype(np.int8)
     
-    # Numeric columns
-    numeric_cols = ['stops', 'days_left', 'duration']
+    categorical_cols = CATEGORICAL_COLS
+    numeric_cols = NUMERIC_COLS
     
-    # Encode categorical variables
+    # Encode categorical variables. pd.Categorical does the unique+code
+    # pass in C without materializing a string object array, and the
+    # fitted "encoder" serializes as a plain {code: value} dict; codes
+    # match LabelEncoder's (both sort lexicographically). Small-
+    # cardinality codes fit comfortably in int8.
     if fit_encoders:
         encoders = {}
         for col in categorical_cols:
             if col in df.columns:
-                le = LabelEncoder()
-                df[col] = le.fit_transform(df[col].astype(str))
-                encoders[col] = le
+                cat = df[col].astype('category')
+                df[col] = cat.cat.codes.astype(np.int8)
+                encoders[col] = dict(enumerate(cat.cat.categories))
     else:
         if encoders:
             for col in categorical_cols:
                 if col in df.columns and col in encoders:
-                    df[col] = encoders[col].transform(df[col].astype(str))
-    
-    # Extract time features from datetime columns
+                    enc = encoders[col]
+                    if isinstance(enc, dict):
+                        mapping = {str(v): code for code, v in enc.items()}
+                        df[col] = (df[col].astype(str).map(mapping)
+                                   .fillna(-1).astype(np.int8))
+                    else:
+                        # Older pickles still hold LabelEncoders
+                        df[col] = enc.transform(df[col].astype(str))
+    
+    # Extract time features from datetime columns; unparseable cells
+    # (e.g. bucket labels like "Morning") default to noon on the 1st so
+    # the columns never go all-NaN, which the histogram binner rejects
     for time_col in ['departure_time', 'arrival_time']:
         if time_col in df.columns:
-            df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
-            df[f'{time_col}_hour'] = df[time_col].dt.hour
-            df[f'{time_col}_day'] = df[time_col].dt.day
-            df[f'{time_col}_month'] = df[time_col].dt.month
+            parsed = pd.to_datetime(df[time_col], errors='coerce')
+            df[f'{time_col}_hour'] = parsed.dt.hour.fillna(12).astype(np.int8)
+            df[f'{time_col}_day'] = parsed.dt.day.fillna(1).astype(np.int8)
+            df[f'{time_col}_month'] = parsed.dt.month.fillna(1).astype(np.int8)
             df.drop(time_col, axis=1, inplace=True)
     
     # Drop flight number as it's not useful for prediction
@@ -97,7 +119,12 @@ def preprocess_features(df, fit_encoders=True, encoders=None, scaler=None):
     else:
         if scaler:
             X[numeric_cols] = scaler.transform(X[numeric_cols])
-    
+
+    # float32 is what sklearn's tree code works in anyway; converting
+    # here halves the matrix and avoids an internal float64->float32
+    # copy inside fit/predict
+    X = X.astype(np.float32)
+
     return X, y, encoders, scaler, feature_cols
 
 def train_model(csv_path):
@@ -121,15 +148,19 @@ def train_model(csv_path):
     print(f"\nTraining set: {X_train.shape[0]} samples")
     print(f"Test set: {X_test.shape[0]} samples")
     
-    # Train model
-    print("\nTraining Random Forest Regressor...")
-    model = RandomForestRegressor(
-        n_estimators=100,
-        max_depth=20,
-        min_samples_split=10,
-        min_samples_leaf=5,
+    # Train model: histogram-based gradient boosting bins features to
+    # uint8 internally, so it trains several times faster than the
+    # 100-tree forest at similar or better accuracy and the saved model
+    # is far smaller
+    print("\nTraining Hist Gradient Boosting Regressor...")
+    model = HistGradientBoostingRegressor(
+        max_iter=300,
+        max_depth=8,
+        learning_rate=0.05,
+        early_stopping=True,
         random_state=42,
-        n_jobs=-1
+        categorical_features=[col for col in CATEGORICAL_COLS
+                              if col in X_train.columns]
     )
     model.fit(X_train, y_train)
     
@@ -144,14 +175,16 @@ def train_model(csv_path):
     print(f"   RMSE (Root Mean Squared Error): ${rmse:.2f}")
     print(f"   R² Score: {r2:.4f}")
     
-    # Feature importance
-    feature_importance = pd.DataFrame({
-        'feature': feature_cols,
-        'importance': model.feature_importances_
-    }).sort_values('importance', ascending=False)
-    
-    print(f"\n🎯 Top 10 Important Features:")
-    print(feature_importance.head(10).to_string(index=False))
+    # Feature importance (gradient boosting doesn't expose impurity
+    # importances; keep the report for models that do)
+    if hasattr(model, 'feature_importances_'):
+        feature_importance = pd.DataFrame({
+            'feature': feature_cols,
+            'importance': model.feature_importances_
+        }).sort_values('importance', ascending=False)
+
+        print(f"\n🎯 Top 10 Important Features:")
+        print(feature_importance.head(10).to_string(index=False))
     
     # Save model and preprocessing objects
     model_path = MODELS_DIR / "price_model.pkl"
@@ -169,6 +202,24 @@ def train_model(csv_path):
     print(f"✅ Scaler saved to {scaler_path}")
     print(f"✅ Features saved to {features_path}")
 
+    # Best-effort export of a compiled model for the serving fast path;
+    # app.py picks it up when onnxruntime is installed. A stale export
+    # from a previous run must not outlive a failed one, or serving
+    # would silently use the old model
+    onnx_path = MODELS_DIR / "price_model.onnx"
+    try:
+        from skl2onnx import to_onnx
+        sample = X_train.iloc[:1].to_numpy().astype(np.float32)
+        onnx_model = to_onnx(model, sample)
+        onnx_path.write_bytes(onnx_model.SerializeToString())
+        print(f"✅ ONNX model exported to {onnx_path}")
+    except ImportError:
+        onnx_path.unlink(missing_ok=True)
+        print("ℹ️  skl2onnx not installed; skipping ONNX export")
+    except Exception as e:
+        onnx_path.unlink(missing_ok=True)
+        print(f"⚠️  ONNX export failed: {e}")
+
 if __name__ == "__main__":
     # Path to your CSV file
     csv_file = Path(__file__).parent / "data" / "Clean_Dataset.csv"
@@ -1,43 +1,47 @@
 """
 Flight Price Prediction - Linear Regression Model
-Pure Python implementation - no external dependencies
+Self-contained implementation - only NumPy for the numeric hot paths
 Run: python train_simple.py
 """
 
-import csv
 import json
-import math
 from pathlib import Path
-from datetime import datetime
-import random
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+
+    def _dump_model(model_data, model_file):
+        """Write the model JSON with orjson (Rust-backed, ndarray-aware)."""
+        with open(model_file, 'wb') as f:
+            f.write(orjson.dumps(
+                model_data,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2))
+except ImportError:
+    def _dump_model(model_data, model_file):
+        """Write the model JSON with the stdlib encoder (fallback)."""
+        with open(model_file, 'w') as f:
+            json.dump(model_data, f, indent=2)
+
 
 def load_csv(filepath):
-    """Load CSV file"""
-    data = []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            data.append(row)
-    return data
-
-
-def extract_hour(time_str):
-    """Extract hour from datetime string"""
-    try:
-        dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-        return dt.hour
-    except:
-        try:
-            return int(time_str.split(' ')[1].split(':')[0])
-        except:
-            return 12
-
-
-def encode_categorical(value, categories):
-    """Encode categorical value"""
-    if value not in categories:
-        categories[value] = len(categories)
-    return categories[value]
+    """Load CSV file into a DataFrame (C tokenizer, no per-row dicts)"""
+    return pd.read_csv(filepath)
+
+
+def encode_categorical(series):
+    """Encode a categorical column; returns (codes array, value->code map)"""
+    cat = series.astype('category')
+    codes = cat.cat.codes.to_numpy()
+    mapping = {str(value): code for code, value in enumerate(cat.cat.categories)}
+    return codes, mapping
+
+
+def extract_hours(series):
+    """Hour column for a whole datetime series, unparseable rows -> noon"""
+    return pd.to_datetime(series, errors='coerce').dt.hour.fillna(12).to_numpy()
 
 
 class LinearRegression:
@@ -51,110 +55,85 @@ class LinearRegression:
     
     def fit(self, X, y, learning_rate=0.001, iterations=100):
         """Train the model"""
-        n_features = len(X[0])
-        self.weights = [0.0] * n_features
-        self.bias = 0.0
-        
-        # Normalize features
-        self.mean_x = [sum(X[i][j] for i in range(len(X))) / len(X) for j in range(n_features)]
-        self.std_x = []
-        
-        for j in range(n_features):
-            variance = sum((X[i][j] - self.mean_x[j]) ** 2 for i in range(len(X))) / len(X)
-            self.std_x.append(math.sqrt(variance) if variance > 0 else 1)
-        
-        # Normalize
-        X_norm = []
-        for i in range(len(X)):
-            row = []
-            for j in range(n_features):
-                normalized = (X[i][j] - self.mean_x[j]) / self.std_x[j]
-                row.append(normalized)
-            X_norm.append(row)
-        
-        # Gradient descent
+        Xa = np.asarray(X, dtype=np.float64)
+        n, n_features = Xa.shape
+
+        # Normalize features: mean/std/centering as three whole-array ops
+        # (constant columns get std 1 so they normalize to zero)
+        mean = Xa.mean(axis=0)
+        std = Xa.std(axis=0)
+        std = np.where(std > 0, std, 1.0)
+        Xn = (Xa - mean) / std
+
+        # Serialized as plain lists only at save time
+        self.mean_x = mean.tolist()
+        self.std_x = std.tolist()
+
+        # Gradient descent, one BLAS matrix-vector product per step:
+        # predictions = Xn @ w + b, weight gradient = -2/N * Xn.T @ errors
+        ya = np.asarray(y, dtype=np.float64)
+        weights = np.zeros(n_features)
+        bias = 0.0
+
         for iteration in range(iterations):
-            # Predictions
-            predictions = []
-            for i in range(len(X_norm)):
-                pred = self.bias + sum(self.weights[j] * X_norm[i][j] for j in range(n_features))
-                predictions.append(pred)
-            
-            # Calculate gradients
-            errors = [y[i] - predictions[i] for i in range(len(y))]
-            
-            # Update weights
-            for j in range(n_features):
-                gradient = -2 * sum(errors[i] * X_norm[i][j] for i in range(len(X_norm))) / len(X_norm)
-                self.weights[j] -= learning_rate * gradient
-            
-            # Update bias
-            bias_gradient = -2 * sum(errors) / len(errors)
-            self.bias -= learning_rate * bias_gradient
-            
+            errors = ya - (Xn @ weights + bias)
+            weights += learning_rate * 2 / n * (Xn.T @ errors)
+            bias += learning_rate * 2 * errors.mean()
+
             if (iteration + 1) % 20 == 0:
-                mse = sum(e ** 2 for e in errors) / len(errors)
+                mse = float(np.mean(errors ** 2))
                 print(f"   Iteration {iteration + 1}/{iterations}: MSE = {mse:.2f}")
+
+        self.weights = weights.tolist()
+        self.bias = float(bias)
     
     def predict(self, X):
         """Make predictions"""
-        predictions = []
-        for i in range(len(X)):
-            # Normalize
-            normalized = []
-            for j in range(len(X[i])):
-                norm_val = (X[i][j] - self.mean_x[j]) / self.std_x[j]
-                normalized.append(norm_val)
-            
-            # Predict
-            pred = self.bias + sum(self.weights[j] * normalized[j] for j in range(len(normalized)))
-            predictions.append(max(0, pred))  # Ensure positive price
-        
-        return predictions
+        Xn = (np.asarray(X, dtype=np.float64) - self.mean_x) / self.std_x
+        predictions = Xn @ self.weights + self.bias
+        return np.maximum(predictions, 0).tolist()  # Ensure positive price
 
 
 def train_model(csv_path):
     """Train price prediction model"""
     
     print(f"📚 Loading flight data from {csv_path}...")
-    data = load_csv(csv_path)
-    print(f"✅ Loaded {len(data)} flight records\n")
-    
-    # Prepare features
-    X = []
-    y = []
-    
-    # Category encoders for later use in predictions
-    airline_map = {}
-    source_map = {}
-    dest_map = {}
-    class_map = {}
-    
+    df = load_csv(csv_path)
+    print(f"✅ Loaded {len(df)} flight records\n")
+
     print("🔄 Processing features...")
-    for idx, record in enumerate(data):
-        try:
-            features = [
-                encode_categorical(record['airline'], airline_map),
-                encode_categorical(record['source_city'], source_map),
-                float(record['stops']),
-                float(extract_hour(record['departure_time'])),
-                float(extract_hour(record['arrival_time'])),
-                encode_categorical(record['destination_city'], dest_map),
-                encode_categorical(record['class'], class_map),
-                float(record['duration']),
-                float(record['days_left']),
-            ]
-            price = float(record['price'])
-            
-            X.append(features)
-            y.append(price)
-        except (ValueError, KeyError) as e:
-            print(f"  ⚠️  Skipped row {idx}: {e}")
-            continue
-    
+    # Category encoders for later use in predictions
+    airline_codes, airline_map = encode_categorical(df['airline'])
+    source_codes, source_map = encode_categorical(df['source_city'])
+    dest_codes, dest_map = encode_categorical(df['destination_city'])
+    class_codes, class_map = encode_categorical(df['class'])
+
+    # Whole-column assembly into a preallocated float32 matrix — no
+    # intermediate stack/copy; hours come from one to_datetime pass per
+    # column, numerics are coerced in bulk (bad cells become NaN and
+    # are dropped below)
+    features = np.empty((len(df), 9), dtype=np.float32)
+    features[:, 0] = airline_codes
+    features[:, 1] = source_codes
+    features[:, 2] = pd.to_numeric(df['stops'], errors='coerce')
+    features[:, 3] = extract_hours(df['departure_time'])
+    features[:, 4] = extract_hours(df['arrival_time'])
+    features[:, 5] = dest_codes
+    features[:, 6] = class_codes
+    features[:, 7] = pd.to_numeric(df['duration'], errors='coerce')
+    features[:, 8] = pd.to_numeric(df['days_left'], errors='coerce')
+    prices = pd.to_numeric(df['price'], errors='coerce').to_numpy(dtype=np.float64)
+
+    valid = np.isfinite(features).all(axis=1) & np.isfinite(prices)
+    skipped = int((~valid).sum())
+    if skipped:
+        print(f"  ⚠️  Skipped {skipped} rows with missing or malformed fields")
+    X = features[valid]
+    y = prices[valid]
+
     print(f"\n✅ Processed {len(X)} valid records")
-    print(f"💰 Price range: ${min(y):.2f} - ${max(y):.2f}")
-    print(f"📊 Average price: ${sum(y)/len(y):.2f}")
+    print(f"💰 Price range: ${y.min():.2f} - ${y.max():.2f}")
+    print(f"📊 Average price: ${y.mean():.2f}")
     
     print(f"\n🎯 Features used: airline, source_city, stops, dep_hour, arr_hour, destination, class, duration, days_left")
     print(f"🏷️  Categories found:")
@@ -167,11 +146,11 @@ def train_model(csv_path):
     model = LinearRegression()
     model.fit(X, y, learning_rate=0.01, iterations=100)
     
-    # Evaluate
-    predictions = model.predict(X)
-    errors = [abs(predictions[i] - y[i]) for i in range(len(y))]
-    mae = sum(errors) / len(errors)
-    rmse = math.sqrt(sum(e ** 2 for e in errors) / len(errors))
+    # Evaluate (one SIMD pass per metric instead of N Python ops)
+    predictions = np.asarray(model.predict(X))
+    errors = np.abs(predictions - y)
+    mae = float(errors.mean())
+    rmse = float(np.sqrt(np.mean(errors ** 2)))
     
     print(f"\n📊 Model Performance:")
     print(f"   MAE (Mean Absolute Error): ${mae:.2f}")
@@ -189,7 +168,7 @@ def train_model(csv_path):
         'class_map': class_map,
         'mae': mae,
         'rmse': rmse,
-        'avg_price': sum(y) / len(y),
+        'avg_price': float(y.mean()),
         'feature_names': ['airline', 'source_city', 'stops', 'departure_hour', 'arrival_hour', 'destination', 'class', 'duration', 'days_left']
     }
     
@@ -197,8 +176,7 @@ def train_model(csv_path):
     model_dir.mkdir(exist_ok=True)
     
     model_file = model_dir / "price_model.json"
-    with open(model_file, 'w') as f:
-        json.dump(model_data, f, indent=2)
+    _dump_model(model_data, model_file)
     
     print(f"\n✅ Model saved to {model_file}")
     print(f"✨ Ready for predictions!")